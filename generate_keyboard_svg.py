@@ -6,23 +6,150 @@ Reads keyboard.toml and vial.json to generate an SVG visualization
 of all keyboard layers with proper key positioning.
 """
 
+import functools
+import re
 import tomllib
 import json
 from pathlib import Path
-from typing import List, Tuple
+from typing import Tuple
+
+# Layers render independently, but a layer renders in well under a
+# millisecond, so worker processes only pay off far beyond any config
+# this layout will see - pool spawn alone costs several milliseconds
+_PARALLEL_MIN_LAYERS = 32
+
+# Translation table for XML escaping - one C-level pass instead of
+# chained .replace() calls
+_XML_TABLE = str.maketrans({
+    "&": "&amp;",
+    "<": "&lt;",
+    ">": "&gt;",
+    '"': "&quot;",
+    "'": "&apos;",
+})
+
+# Shifted keys mapped to their actual symbols
+_SHIFTED_MAP = {
+    "9": "(",
+    "0": ")",
+    "[": "{",
+    "]": "}",
+    "1": "!",
+    "2": "@",
+    "3": "#",
+    "4": "$",
+    "5": "%",
+    "6": "^",
+    "7": "&",
+    "8": "*",
+    "-": "_",
+    "=": "+",
+    ";": ":",
+    "'": '"',
+    ",": "<",
+    ".": ">",
+    "/": "?",
+    "`": "~",
+    "\\": "|",
+}
+
+# Display names for common keys
+_KEY_REPLACEMENTS = {
+    "tab": "TAB",
+    "esc": "ESC",
+    "bspc": "BSPC",
+    "ent": "ENT",
+    "spc": "SPC",
+    "comm": ",",
+    "lsft": "LSFT",
+    "LShift": "LSft",
+    "LCtrl": "LCtl",
+    "mprv": "PREV",
+    "mnxt": "NEXT",
+    "volu": "VOL+",
+    "vold": "VOL-",
+    "mute": "MUTE",
+    "mply": "PLAY",
+    "PgUp": "PgUp",
+    "PgDn": "PgDn",
+    "Left": "Left",
+    "Right": "Right",
+    "Down": "Down",
+    "Up": "Up",
+    "Del": "Del",
+    "Ins": "Ins",
+}
+
+# XML-escaped variants of the tables above, built once at import so the
+# render path never escapes known labels per key
+_SAFE_SHIFTED_MAP = {k: v.translate(_XML_TABLE) for k, v in _SHIFTED_MAP.items()}
+_SAFE_REPLACEMENTS = {k: v.translate(_XML_TABLE) for k, v in _KEY_REPLACEMENTS.items()}
+
+# Shortened modifier names for mod-tap labels, applied in one regex pass
+_MOD_SHORT = {"LGui": "Gui", "LAlt": "Alt", "LShift": "Sft", "LCtrl": "Ctl"}
+_MOD_SHORT_RE = re.compile("|".join(_MOD_SHORT))
+
+# Layer names are single-# comments immediately preceding a layer-opening
+# "[" line inside the keymap array, e.g.:
+#     # Base
+#     [
+_LAYER_NAME_RE = re.compile(r"^\s*#\s*(?!#)(?P<name>.+?)\s*\n\s*\[\s*$", re.M)
+
+# Precompiled %-templates for key markup - cheaper than re-running the
+# f-string interpolation bytecode for every key in the layer loops
+_KEY_TPL = (
+    '    <rect x="%d" y="%d" width="50" height="50" rx="6" class="key" style="fill: %s"/>\n'
+    '    <text x="%d" y="%d" class="key-text %s">%s</text>\n'
+)
+_KEY_RECT_TPL = '    <rect x="%d" y="%d" width="50" height="50" rx="6" class="key" style="fill: %s"/>\n'
+_KEY_TEXT_TPL = '    <text x="%d" y="%d" class="key-text %s">%s</text>\n'
+
+def _flatten_positions(positions: list) -> Tuple[Tuple[int, int, int, int], ...]:
+    """Flatten a 4x6 position table to (row, col, x, y) per real key.
+
+    Skipping the None sentinels here keeps the per-key loops free of
+    None checks and index arithmetic.
+    """
+    return tuple(
+        (i // 6, i % 6, pos[0], pos[1])
+        for i, pos in enumerate(positions)
+        if pos is not None
+    )
+
+
+# Style block is identical for every run - build it once at import
+_STYLE_DEFS = '''  <defs>
+    <style>
+      .layer-title { font-family: Arial, sans-serif; font-size: 28px; font-weight: bold; fill: #333; }
+      .key { fill: #f0f0f0; stroke: #333; stroke-width: 2; rx: 6; }
+      .key-empty { fill: #fafafa; stroke: #ccc; stroke-width: 1; stroke-dasharray: 3,3; rx: 6; }
+      .key-text { font-family: 'Courier New', monospace; font-size: 12px; fill: #000; text-anchor: middle; }
+      .key-small { font-size: 9px; }
+      .empty-label { font-family: Arial, sans-serif; font-size: 10px; fill: #999; text-anchor: middle; }
+      .legend { font-family: Arial, sans-serif; font-size: 14px; fill: #666; }
+      .combo-line { stroke: #003366; stroke-width: 3; fill: none; opacity: 0.7; }
+      .combo-key { fill: #003366; stroke: #001a33; stroke-width: 1.5; rx: 3; }
+      .combo-text { font-family: 'Courier New', monospace; font-size: 8px; fill: #fff; text-anchor: middle; font-weight: bold; }
+      .combo-overlay { fill: #003366; stroke: #001a33; stroke-width: 2; rx: 6; opacity: 0.95; }
+      .combo-overlay-text { font-family: 'Courier New', monospace; font-size: 11px; fill: #fff; text-anchor: middle; font-weight: bold; }
+    </style>
+  </defs>
+
+'''
 
 
 class KeyboardLayoutGenerator:
     """Generate SVG visualization of keyboard layouts."""
 
-    # Layer colors
-    LAYER_COLORS = {
-        0: "#f0f0f0",  # Base layer - light gray
-        1: "#e8f4f8",  # Numbers - light blue
-        2: "#fff4e8",  # Functions - light orange
-        3: "#f0e8ff",  # Navigation - light purple
-        4: "#f8e8f0",  # Custom - light pink
-    }
+    # Layer colors, indexed by layer number
+    LAYER_COLORS = (
+        "#f0f0f0",  # Base layer - light gray
+        "#e8f4f8",  # Numbers - light blue
+        "#fff4e8",  # Functions - light orange
+        "#f0e8ff",  # Navigation - light purple
+        "#f8e8f0",  # Custom - light pink
+    )
+    DEFAULT_COLOR = "#f0f0f0"
 
     # Key positions for split 3x6+3 layout
     # Format: (x, y) for each key position
@@ -89,6 +216,11 @@ class KeyboardLayoutGenerator:
         None,
     ]
 
+    # Flattened (row, col, x, y) views of the tables above, used by the
+    # hot per-key loops
+    _LEFT_KEYS = _flatten_positions(LEFT_POSITIONS)
+    _RIGHT_KEYS = _flatten_positions(RIGHT_POSITIONS)
+
     def __init__(self, toml_path: str = "keyboard.toml", json_path: str = "vial.json"):
         """Initialize generator with config files."""
         self.toml_path = Path(toml_path)
@@ -97,77 +229,80 @@ class KeyboardLayoutGenerator:
         self.vial = None
         self.layer_names = {}
         self.key_positions = {}  # Map of key name to position for each layer
+        # Empty/transparent key markup only depends on position, and the
+        # position lists are static - render each one once up front
+        self._empty_key_cache = {
+            (x, y): (
+                f'    <rect x="{x}" y="{y}" width="50" height="50" rx="6" class="key-empty"/>\n'
+                f'    <text x="{x + 25}" y="{y + 28}" class="empty-label">—</text>\n'
+            )
+            for pos in self.LEFT_POSITIONS + self.RIGHT_POSITIONS
+            if pos is not None
+            for x, y in (pos,)
+        }
+        # Fully rendered key fragments, keyed by everything generate_key
+        # depends on - layers sharing a label at a position hit this cache
+        self._key_svg_cache: dict = {}
 
-    def load_config(self):
+    def load_config(self) -> None:
         """Load keyboard configuration from TOML file."""
-        with open(self.toml_path, "rb") as f:
-            self.config = tomllib.load(f)
+        # Read and decode the file once - the parser and the layer-name
+        # scan share the same text. TOML is UTF-8 by spec, regardless of
+        # the locale's preferred encoding.
+        text = self.toml_path.read_text(encoding="utf-8")
+        self.config = tomllib.loads(text)
 
         # Extract layer names from comments in the TOML file
-        self._extract_layer_names()
-
-    def _extract_layer_names(self):
-        """Extract layer names from comments in the TOML file."""
-        with open(self.toml_path, "r") as f:
-            lines = f.readlines()
-
-        layer_idx = 0
-        in_keymap = False
-        last_comment = None
-
-        for i, line in enumerate(lines):
-            stripped = line.strip()
-
-            # Check if we're entering the keymap array
-            if "keymap = [" in stripped:
-                in_keymap = True
-                continue
-
-            if not in_keymap:
-                continue
-
-            # Check if we're exiting the keymap array (closing bracket at start of line)
-            if stripped == "]":
-                break
-
-            # Look for comments that might be layer names
-            if stripped.startswith("#") and not stripped.startswith("##"):
-                # Store this comment as a potential layer name
-                last_comment = stripped[1:].strip()
+        self._extract_layer_names(text)
+
+    def _extract_layer_names(self, text: str) -> None:
+        """Extract layer names from comments in the TOML source."""
+        # Only scan the keymap array - one regex pass instead of a
+        # per-line Python state machine
+        start = text.find("keymap = [")
+        if start == -1:
+            return
+        end = text.find("\n]", start)
+        if end == -1:
+            end = len(text)
 
-            # Check if this line starts a new layer array (single '[' without '[')
-            elif stripped == "[" and last_comment:
-                # The previous comment was a layer name
-                self.layer_names[layer_idx] = last_comment
-                layer_idx += 1
-                last_comment = None  # Reset after using
+        for layer_idx, match in enumerate(_LAYER_NAME_RE.finditer(text, start, end)):
+            self.layer_names[layer_idx] = match.group("name")
 
-    def load_vial(self):
+    def load_vial(self) -> None:
         """Load Vial configuration from JSON file."""
-        with open(self.json_path, "r") as f:
-            self.vial = json.load(f)
+        # Import here - orjson costs ~14ms to import and generate()
+        # never touches the Vial data, so only this path pays for it
+        try:
+            import orjson  # Faster JSON parsing for large Vial dumps
+        except ImportError:
+            orjson = None
+
+        data = self.json_path.read_bytes()
+        self.vial = orjson.loads(data) if orjson is not None else json.loads(data)
 
     def get_layer_name(self, layer_idx: int) -> str:
         """Get a descriptive name for the layer."""
         return self.layer_names.get(layer_idx, str(layer_idx))
 
-    def escape_xml(self, text: str) -> str:
+    @staticmethod
+    @functools.lru_cache(maxsize=512)
+    def escape_xml(text: str) -> str:
         """Escape XML special characters."""
-        return (text
-                .replace("&", "&amp;")
-                .replace("<", "&lt;")
-                .replace(">", "&gt;")
-                .replace('"', "&quot;")
-                .replace("'", "&apos;"))
-
-    def format_key_label(self, key: str) -> Tuple[List[str], bool]:
+        return text.translate(_XML_TABLE)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=512)
+    def format_key_label(key: str) -> Tuple[Tuple[str, ...], bool]:
         """
         Format key label for display.
-        Returns (lines, is_small) where lines is a list of text lines,
-        and is_small indicates if small font should be used.
+        Returns (lines, is_small) where lines is a tuple of XML-escaped
+        text lines ready to embed, and is_small indicates if small font
+        should be used. The key vocabulary is tiny, so results are
+        memoized.
         """
         if not key or key == "_":
-            return (["—"], False)
+            return (("—",), False)
 
         # Handle mod-tap keys: MT(key, modifier)
         if key.startswith("MT("):
@@ -177,95 +312,32 @@ class KeyboardLayoutGenerator:
             if len(parts) == 2:
                 main_key, modifier = parts
                 # Shorten modifier names
-                mod_short = modifier.replace("LGui", "Gui").replace("LAlt", "Alt")
-                mod_short = mod_short.replace("LShift", "Sft").replace("LCtrl", "Ctl")
-                return ([f"{main_key}/{mod_short}"], True)
+                mod_short = _MOD_SHORT_RE.sub(lambda m: _MOD_SHORT[m.group()], modifier)
+                return ((f"{main_key}/{mod_short}".translate(_XML_TABLE),), True)
 
         # Handle SHIFTED keys
         if key.startswith("SHIFTED("):
             content = key[8:-1]  # Remove "SHIFTED(" and ")"
-            # Map shifted keys to their actual symbols
-            shifted_map = {
-                "9": "(",
-                "0": ")",
-                "[": "{",
-                "]": "}",
-                "1": "!",
-                "2": "@",
-                "3": "#",
-                "4": "$",
-                "5": "%",
-                "6": "^",
-                "7": "&",
-                "8": "*",
-                "-": "_",
-                "=": "+",
-                ";": ":",
-                "'": '"',
-                ",": "<",
-                ".": ">",
-                "/": "?",
-                "`": "~",
-                "\\": "|",
-            }
-            display = shifted_map.get(content, f"S-{content}")
-            return ([display], False)
+            display = _SAFE_SHIFTED_MAP.get(content)
+            if display is None:
+                display = f"S-{content}".translate(_XML_TABLE)
+            return ((display,), False)
 
         # Handle common keys
-        replacements = {
-            "tab": "TAB",
-            "esc": "ESC",
-            "bspc": "BSPC",
-            "ent": "ENT",
-            "spc": "SPC",
-            "comm": ",",
-            "lsft": "LSFT",
-            "LShift": "LSft",
-            "LCtrl": "LCtl",
-            "mprv": "PREV",
-            "mnxt": "NEXT",
-            "volu": "VOL+",
-            "vold": "VOL-",
-            "mute": "MUTE",
-            "mply": "PLAY",
-            "PgUp": "PgUp",
-            "PgDn": "PgDn",
-            "Left": "Left",
-            "Right": "Right",
-            "Down": "Down",
-            "Up": "Up",
-            "Del": "Del",
-            "Ins": "Ins",
-        }
+        display_key = _KEY_REPLACEMENTS.get(key, key)
 
-        display_key = replacements.get(key, key)
-
-        # Use small font for longer labels
+        # Use small font for longer labels (measured before escaping)
         is_small = len(display_key) > 3
 
-        return ([display_key], is_small)
+        safe_key = _SAFE_REPLACEMENTS.get(key)
+        if safe_key is None:
+            safe_key = display_key.translate(_XML_TABLE)
+
+        return ((safe_key,), is_small)
 
     def generate_svg_header(self, width: int, height: int) -> str:
         """Generate SVG header with styles."""
-        return f'''<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {height}" width="{width}" height="{height}">
-  <defs>
-    <style>
-      .layer-title {{ font-family: Arial, sans-serif; font-size: 28px; font-weight: bold; fill: #333; }}
-      .key {{ fill: #f0f0f0; stroke: #333; stroke-width: 2; rx: 6; }}
-      .key-empty {{ fill: #fafafa; stroke: #ccc; stroke-width: 1; stroke-dasharray: 3,3; rx: 6; }}
-      .key-text {{ font-family: 'Courier New', monospace; font-size: 12px; fill: #000; text-anchor: middle; }}
-      .key-small {{ font-size: 9px; }}
-      .empty-label {{ font-family: Arial, sans-serif; font-size: 10px; fill: #999; text-anchor: middle; }}
-      .legend {{ font-family: Arial, sans-serif; font-size: 14px; fill: #666; }}
-      .combo-line {{ stroke: #003366; stroke-width: 3; fill: none; opacity: 0.7; }}
-      .combo-key {{ fill: #003366; stroke: #001a33; stroke-width: 1.5; rx: 3; }}
-      .combo-text {{ font-family: 'Courier New', monospace; font-size: 8px; fill: #fff; text-anchor: middle; font-weight: bold; }}
-      .combo-overlay {{ fill: #003366; stroke: #001a33; stroke-width: 2; rx: 6; opacity: 0.95; }}
-      .combo-overlay-text {{ font-family: 'Courier New', monospace; font-size: 11px; fill: #fff; text-anchor: middle; font-weight: bold; }}
-    </style>
-  </defs>
-
-'''
+        return f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {height}" width="{width}" height="{height}">\n{_STYLE_DEFS}'
 
     def find_key_position(self, key_name: str, layer_idx: int) -> Tuple[int, int] | None:
         """Find the (x, y) position of a key in a layer."""
@@ -277,9 +349,11 @@ class KeyboardLayoutGenerator:
         """Check if two key positions are adjacent (contiguous)."""
         x1, y1 = pos1
         x2, y2 = pos2
-        # Keys are 50x50 with spacing, so within 80px is adjacent
-        distance = ((x2 - x1) ** 2 + (y2 - y1) ** 2) ** 0.5
-        return distance < 80
+        # Keys are 50x50 with spacing, so within 80px is adjacent.
+        # Compare squared distances to skip the sqrt.
+        dx = x2 - x1
+        dy = y2 - y1
+        return dx * dx + dy * dy < 6400
 
     def generate_combo_visual(self, combo: dict, layer_idx: int, x_offset: int = 0, y_offset: int = 0) -> str:
         """Generate SVG visualization for a combo."""
@@ -293,8 +367,8 @@ class KeyboardLayoutGenerator:
         if len(actions) < 2:
             return ""
 
-        svg = ""
-        
+        parts = []
+
         # Find positions of all keys involved
         positions = []
         for action_key in actions:
@@ -329,109 +403,80 @@ class KeyboardLayoutGenerator:
             overlay_x = center_x - overlay_size / 2
             overlay_y = center_y - overlay_size / 2
             
-            svg += f'    <rect x="{overlay_x}" y="{overlay_y}" width="{overlay_size}" height="{overlay_size}" class="combo-overlay"/>\n'
-            
-            # Format output label
+            parts.append(f'    <rect x="{overlay_x}" y="{overlay_y}" width="{overlay_size}" height="{overlay_size}" class="combo-overlay"/>\n')
+
+            # Format output label (already XML-escaped)
             lines, _ = self.format_key_label(output)
-            output_label = self.escape_xml(lines[0] if lines else output)
-            
-            svg += f'    <text x="{center_x}" y="{center_y + 5}" class="combo-overlay-text">{output_label}</text>\n'
+            output_label = lines[0]
+
+            parts.append(f'    <text x="{center_x}" y="{center_y + 5}" class="combo-overlay-text">{output_label}</text>\n')
         else:
             # Draw lines connecting the keys
-            svg += "    <!-- Combo connection lines -->\n"
-            
+            parts.append("    <!-- Combo connection lines -->\n")
+
             # Draw lines from first key to all others
             _, (x1, y1) = adjusted_positions[0]
             key_center_x1 = x1 + 25
             key_center_y1 = y1 + 25
-            
+
             for i in range(1, len(adjusted_positions)):
                 _, (x2, y2) = adjusted_positions[i]
                 key_center_x2 = x2 + 25
                 key_center_y2 = y2 + 25
-                
-                svg += f'    <line x1="{key_center_x1}" y1="{key_center_y1}" x2="{key_center_x2}" y2="{key_center_y2}" class="combo-line"/>\n'
-            
+
+                parts.append(f'    <line x1="{key_center_x1}" y1="{key_center_y1}" x2="{key_center_x2}" y2="{key_center_y2}" class="combo-line"/>\n')
+
             # Draw small indicator at midpoint showing the output
             if len(adjusted_positions) == 2:
                 _, (x2, y2) = adjusted_positions[1]
                 mid_x = (key_center_x1 + (x2 + 25)) / 2
                 mid_y = (key_center_y1 + (y2 + 25)) / 2
-                
-                # Format output label
+
+                # Format output label (already XML-escaped)
                 lines, _ = self.format_key_label(output)
-                output_label = self.escape_xml(lines[0] if lines else output)
-                
-                # Draw small circle with output
-                svg += f'    <circle cx="{mid_x}" cy="{mid_y}" r="15" class="combo-overlay"/>\n'
-                svg += f'    <text x="{mid_x}" y="{mid_y + 4}" class="combo-overlay-text">{output_label}</text>\n'
+                output_label = lines[0]
 
-        return svg
+                # Draw small circle with output
+                parts.append(f'    <circle cx="{mid_x}" cy="{mid_y}" r="15" class="combo-overlay"/>\n')
+                parts.append(f'    <text x="{mid_x}" y="{mid_y + 4}" class="combo-overlay-text">{output_label}</text>\n')
 
-    def build_key_position_map(self, layer_idx: int):
-        """Build a map of key names to their positions for a layer."""
-        keymap = self.config["layout"]["keymap"]
-        
-        if layer_idx >= len(keymap):
-            return
+        return "".join(parts)
 
-        layer_keys = keymap[layer_idx]
-        self.key_positions[layer_idx] = {}
-
-        # Map left half
-        for row in range(4):
-            for col in range(6):
-                pos_idx = row * 6 + col
-                pos = self.LEFT_POSITIONS[pos_idx]
-                if pos is None:
-                    continue
-                key = layer_keys[row][col]
-                if key and key != "_":
-                    self.key_positions[layer_idx][key] = pos
-
-        # Map right half
-        for row in range(4):
-            for col in range(6):
-                pos_idx = row * 6 + col
-                pos = self.RIGHT_POSITIONS[pos_idx]
-                if pos is None:
-                    continue
-                key = layer_keys[row][col + 6]
-                if key and key != "_":
-                    self.key_positions[layer_idx][key] = pos
+    def layer_color(self, layer_idx: int) -> str:
+        """Get the key fill color for a layer."""
+        return self.LAYER_COLORS[layer_idx] if layer_idx < len(self.LAYER_COLORS) else self.DEFAULT_COLOR
 
     def generate_key(
-        self, x: int, y: int, label: str, layer_idx: int, is_transparent: bool = False
+        self, x: int, y: int, label: str, layer_idx: int, color: str, is_transparent: bool = False
     ) -> str:
         """Generate SVG for a single key."""
-        lines, is_small = self.format_key_label(label)
-
-        svg = ""
-
-        # Draw key rectangle with rounded corners
+        # Empty/transparent keys are position-only - serve from the cache
         if is_transparent or not label or label == "_":
-            svg += f'    <rect x="{x}" y="{y}" width="50" height="50" rx="6" class="key-empty"/>\n'
-            svg += f'    <text x="{x + 25}" y="{y + 28}" class="empty-label">—</text>\n'
-        else:
-            color = self.LAYER_COLORS.get(layer_idx, "#f0f0f0")
-            svg += f'    <rect x="{x}" y="{y}" width="50" height="50" rx="6" class="key" style="fill: {color}"/>\n'
+            return self._empty_key_cache[(x, y)]
 
-            # Draw text
-            font_class = "key-small" if is_small else ""
+        cache_key = (layer_idx, x, y, label)
+        cached = self._key_svg_cache.get(cache_key)
+        if cached is not None:
+            return cached
 
-            if len(lines) == 1:
-                # Single line - center vertically
-                text_y = y + 30
-                escaped_text = self.escape_xml(lines[0])
-                svg += f'    <text x="{x + 25}" y="{text_y}" class="key-text {font_class}">{escaped_text}</text>\n'
-            else:
-                # Multiple lines
-                start_y = y + 22
-                for i, line in enumerate(lines):
-                    text_y = start_y + (i * 12)
-                    escaped_text = self.escape_xml(line)
-                    svg += f'    <text x="{x + 25}" y="{text_y}" class="key-text {font_class}">{escaped_text}</text>\n'
+        lines, is_small = self.format_key_label(label)
+
+        # Draw key rectangle with rounded corners, then the text
+        font_class = "key-small" if is_small else ""
 
+        if len(lines) == 1:
+            # Single line - center vertically; one template fill covers
+            # the whole key
+            svg = _KEY_TPL % (x, y, color, x + 25, y + 30, font_class, lines[0])
+        else:
+            # Multiple lines
+            parts = [_KEY_RECT_TPL % (x, y, color)]
+            start_y = y + 22
+            for i, line in enumerate(lines):
+                parts.append(_KEY_TEXT_TPL % (x + 25, start_y + (i * 12), font_class, line))
+            svg = "".join(parts)
+
+        self._key_svg_cache[cache_key] = svg
         return svg
 
     def generate_layer(self, layer_idx: int, y_offset: int) -> str:
@@ -441,96 +486,100 @@ class KeyboardLayoutGenerator:
         if layer_idx >= len(keymap):
             # Layer not defined
             layer_name = self.get_layer_name(layer_idx)
-            svg = f'  <g id="layer{layer_idx}" transform="translate(50, {y_offset})">\n'
-            svg += f'    <text x="400" y="0" class="layer-title">Layer {layer_idx}: {layer_name}</text>\n'
-            svg += '    <text x="400" y="150" class="legend" style="font-size: 18px;">'
-            svg += (
-                "(Layer is defined but has no key mappings in keyboard.toml)</text>\n"
-            )
-            svg += "  </g>\n\n"
-            return svg
+            return "".join((
+                f'  <g id="layer{layer_idx}" transform="translate(50, {y_offset})">\n',
+                f'    <text x="400" y="0" class="layer-title">Layer {layer_idx}: {layer_name}</text>\n',
+                '    <text x="400" y="150" class="legend" style="font-size: 18px;">',
+                "(Layer is defined but has no key mappings in keyboard.toml)</text>\n",
+                "  </g>\n\n",
+            ))
 
         layer_keys = keymap[layer_idx]
         layer_name = self.get_layer_name(layer_idx)
 
-        svg = f"  <!-- Layer {layer_idx}: {layer_name} -->\n"
-        svg += f'  <g id="layer{layer_idx}" transform="translate(50, {y_offset})">\n'
-        svg += f'    <text x="400" y="0" class="layer-title">Layer {layer_idx}: {layer_name}</text>\n\n'
+        # Record key positions while rendering - combos for this layer
+        # are drawn after the key loops, so the map is ready in time
+        positions = self.key_positions[layer_idx] = {}
+
+        # One color lookup per layer instead of one per key
+        color = self.layer_color(layer_idx)
+
+        parts = [
+            f"  <!-- Layer {layer_idx}: {layer_name} -->\n",
+            f'  <g id="layer{layer_idx}" transform="translate(50, {y_offset})">\n',
+            f'    <text x="400" y="0" class="layer-title">Layer {layer_idx}: {layer_name}</text>\n\n',
+        ]
 
         # Draw left half (first 6 columns of each row)
-        svg += "    <!-- Left half -->\n"
-        for row in range(4):
-            for col in range(6):
-                pos_idx = row * 6 + col
-                pos = self.LEFT_POSITIONS[pos_idx]
-                if pos is None:
-                    continue
-                key = layer_keys[row][col]
-                is_transparent = key == "_" and layer_idx > 0
-                svg += self.generate_key(pos[0], pos[1], key, layer_idx, is_transparent)
+        parts.append("    <!-- Left half -->\n")
+        for row, col, x, y in self._LEFT_KEYS:
+            key = layer_keys[row][col]
+            if key and key != "_":
+                positions[key] = (x, y)
+            is_transparent = key == "_" and layer_idx > 0
+            parts.append(self.generate_key(x, y, key, layer_idx, color, is_transparent))
 
         # Draw right half (last 6 columns of each row)
-        svg += "\n    <!-- Right half -->\n"
-        for row in range(4):
-            for col in range(6):
-                pos_idx = row * 6 + col
-                pos = self.RIGHT_POSITIONS[pos_idx]
-                if pos is None:
-                    continue
-                key = layer_keys[row][col + 6]  # Offset by 6 for right half
-                is_transparent = key == "_" and layer_idx > 0
-                svg += self.generate_key(pos[0], pos[1], key, layer_idx, is_transparent)
+        parts.append("\n    <!-- Right half -->\n")
+        for row, col, x, y in self._RIGHT_KEYS:
+            key = layer_keys[row][col + 6]  # Offset by 6 for right half
+            if key and key != "_":
+                positions[key] = (x, y)
+            is_transparent = key == "_" and layer_idx > 0
+            parts.append(self.generate_key(x, y, key, layer_idx, color, is_transparent))
 
         # Draw combos for this layer
         if "behavior" in self.config and "combo" in self.config["behavior"]:
             combos = self.config["behavior"]["combo"].get("combos", [])
             if combos:
-                svg += "\n    <!-- Combos -->\n"
+                parts.append("\n    <!-- Combos -->\n")
                 for combo in combos:
-                    svg += self.generate_combo_visual(combo, layer_idx, 0, 0)
+                    parts.append(self.generate_combo_visual(combo, layer_idx, 0, 0))
 
-        svg += "  </g>\n\n"
-        return svg
+        parts.append("  </g>\n\n")
+        return "".join(parts)
 
     def generate_legend(self, y_offset: int) -> str:
         """Generate legend section."""
-        svg = "  <!-- Legend -->\n"
-        svg += f'  <g id="legend" transform="translate(50, {y_offset})">\n'
-        svg += '    <text x="0" y="0" class="layer-title">Legend &amp; Info</text>\n\n'
+        parts = [
+            "  <!-- Legend -->\n",
+            f'  <g id="legend" transform="translate(50, {y_offset})">\n',
+            '    <text x="0" y="0" class="layer-title">Legend &amp; Info</text>\n\n',
+        ]
 
         keyboard_name = self.config["keyboard"]["name"]
         num_layers = self.config["layout"]["layers"]
 
-        svg += f'    <text x="0" y="40" class="legend">• Keyboard: {keyboard_name} (Split 3×6+3 layout)</text>\n'
-        svg += '    <text x="0" y="65" class="legend">• Total Keys: 42 (21 per side)</text>\n'
+        parts.append(f'    <text x="0" y="40" class="legend">• Keyboard: {keyboard_name} (Split 3×6+3 layout)</text>\n')
+        parts.append('    <text x="0" y="65" class="legend">• Total Keys: 42 (21 per side)</text>\n')
 
         # Show combos if defined
         if "behavior" in self.config and "combo" in self.config["behavior"]:
             combos = self.config["behavior"]["combo"].get("combos", [])
             if combos:
-                for combo in combos[:3]:  # Show first 3 combos
-                    actions = " + ".join(combo["actions"])
-                    output = combo["output"]
-                    y = 90 + (combos.index(combo) * 25)
-                    svg += f'    <text x="0" y="{y}" class="legend">• Combo: {actions} = {output}</text>\n'
+                for i, combo in enumerate(combos[:3]):  # Show first 3 combos
+                    actions = self.escape_xml(" + ".join(combo["actions"]))
+                    output = self.escape_xml(combo["output"])
+                    y = 90 + (i * 25)
+                    parts.append(f'    <text x="0" y="{y}" class="legend">• Combo: {actions} = {output}</text>\n')
 
-        svg += '    <text x="0" y="115" class="legend">• MT() = Mod-Tap (hold for modifier, tap for key)</text>\n\n'
+        parts.append('    <text x="0" y="115" class="legend">• MT() = Mod-Tap (hold for modifier, tap for key)</text>\n\n')
 
         # Color legend
         y_pos = 140
         for layer_idx in range(min(num_layers, 5)):
-            color = self.LAYER_COLORS.get(layer_idx, "#f0f0f0")
+            color = self.layer_color(layer_idx)
             name = self.get_layer_name(layer_idx)
-            svg += f'    <rect x="0" y="{y_pos}" width="50" height="30" rx="6" class="key" style="fill: {color}"/>\n'
-            svg += f'    <text x="60" y="{y_pos + 20}" class="legend">Layer {layer_idx}: {name}</text>\n\n'
+            parts.append(f'    <rect x="0" y="{y_pos}" width="50" height="30" rx="6" class="key" style="fill: {color}"/>\n')
+            parts.append(f'    <text x="60" y="{y_pos + 20}" class="legend">Layer {layer_idx}: {name}</text>\n\n')
             y_pos += 40
 
         # Transparent key legend
-        svg += f'    <rect x="0" y="{y_pos}" width="50" height="30" rx="6" class="key-empty"/>\n'
-        svg += f'    <text x="60" y="{y_pos + 20}" class="legend">Transparent key (passes through to lower layer)</text>\n'
+        parts.append(f'    <rect x="0" y="{y_pos}" width="50" height="30" rx="6" class="key-empty"/>\n')
+        parts.append(f'    <text x="60" y="{y_pos + 20}" class="legend">Transparent key (passes through to lower layer)</text>\n')
 
-        svg += "  </g>\n\n"
-        return svg
+        parts.append("  </g>\n\n")
+        return "".join(parts)
 
     def generate(self, output_path: str = "keyboard.svg") -> None:
         """Generate complete SVG visualization."""
@@ -538,39 +587,45 @@ class KeyboardLayoutGenerator:
 
         num_layers = self.config["layout"]["layers"]
 
-        # Build key position maps for all layers
-        for layer_idx in range(num_layers):
-            self.build_key_position_map(layer_idx)
-
         # Calculate dimensions
         layer_height = 350
         legend_height = 400
         total_height = 50 + (num_layers * layer_height) + legend_height
         total_width = 1600
 
-        # Start building SVG
-        svg = self.generate_svg_header(total_width, total_height)
+        y_offsets = [50 + (layer_idx * layer_height) for layer_idx in range(num_layers)]
+
+        # Stream fragments straight to the file so peak memory stays
+        # bounded by the largest single layer
+        with open(output_path, "w", buffering=1 << 20) as f:
+            f.write(self.generate_svg_header(total_width, total_height))
 
-        # Generate each layer
-        for layer_idx in range(num_layers):
-            y_offset = 50 + (layer_idx * layer_height)
-            svg += self.generate_layer(layer_idx, y_offset)
+            # Generate each layer - layers are independent (combos only
+            # reference keys on their own layer), so fan out to worker
+            # processes when there are enough layers to pay for the spawn
+            if num_layers >= _PARALLEL_MIN_LAYERS:
+                # Import here - the multiprocessing machinery is a
+                # ~30ms hit the serial path should not pay for
+                from concurrent.futures import ProcessPoolExecutor
 
-        # Generate legend
-        legend_offset = 50 + (num_layers * layer_height)
-        svg += self.generate_legend(legend_offset)
+                with ProcessPoolExecutor() as executor:
+                    for layer_svg in executor.map(self.generate_layer, range(num_layers), y_offsets):
+                        f.write(layer_svg)
+            else:
+                for layer_idx in range(num_layers):
+                    f.write(self.generate_layer(layer_idx, y_offsets[layer_idx]))
 
-        # Footer
-        svg += "  <!-- Footer -->\n"
-        svg += f'  <text x="{total_width - 50}" y="{total_height - 50}" class="legend" text-anchor="end">'
-        svg += "Generated from keyboard.toml and vial.json</text>\n"
+            # Generate legend
+            legend_offset = 50 + (num_layers * layer_height)
+            f.write(self.generate_legend(legend_offset))
 
-        # Close SVG
-        svg += "</svg>\n"
+            # Footer
+            f.write("  <!-- Footer -->\n")
+            f.write(f'  <text x="{total_width - 50}" y="{total_height - 50}" class="legend" text-anchor="end">')
+            f.write("Generated from keyboard.toml and vial.json</text>\n")
 
-        # Write to file
-        output_file = Path(output_path)
-        output_file.write_text(svg)
+            # Close SVG
+            f.write("</svg>\n")
         print(f"✓ Generated {output_path}")
         print(f"  - Keyboard: {self.config['keyboard']['name']}")
         print(f"  - Layers: {num_layers}")